@@ -2,8 +2,13 @@ from flask import Flask, request, jsonify
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
 from flask_cors import CORS
 from db import get_db_connection
+from search import event_index, parse_date_time
 import bcrypt
 import config
+import csv
+import json
+import time
+import uuid
 from datetime import datetime
 from flask_socketio import SocketIO, emit, join_room, leave_room  # ✅ Используем Flask-SocketIO
 
@@ -210,6 +215,15 @@ def user_profile():
             conn.close()
 
 
+EVENT_TEXT_FIELDS = ("title", "description", "date_time", "city", "location")
+# date_time в POST /events и /events/import приводится к naive UTC (parse_date_time)
+INVALID_DATE_TIME_ERROR = "Invalid date_time, expected ISO 8601"
+
+
+def _has_non_string_fields(data):
+    return any(data.get(field) is not None and not isinstance(data.get(field), str) for field in EVENT_TEXT_FIELDS)
+
+
 @app.route("/events", methods=["POST"])
 @jwt_required()
 def create_event():
@@ -222,9 +236,17 @@ def create_event():
     
     user_id = get_jwt_identity()  # Получаем ID текущего пользователя
 
+    if _has_non_string_fields(data):
+        return jsonify({"error": "Title, description, date, city, and location must be strings"}), 400
     if not title or not date_time or not city or not location:
         return jsonify({"error": "Title, date, city, and location are required"}), 400
 
+    date_time = parse_date_time(date_time)
+    if date_time is None:
+        return jsonify({"error": INVALID_DATE_TIME_ERROR}), 400
+
+    event_id = str(uuid.uuid4())
+
     conn = None
     try:
         conn = get_db_connection()
@@ -232,12 +254,20 @@ def create_event():
             cursor.execute(
                 """
                 INSERT INTO events (id, title, description, date_time, city, location, created_by)
-                VALUES (UUID(), %s, %s, %s, %s, %s, %s)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
                 """,
-                (title, description, date_time, city, location, user_id),
+                (event_id, title, description, date_time, city, location, user_id),
             )
         conn.commit()
-        return jsonify({"message": "Event created successfully"}), 201
+        # Ошибки индексации не влияют на ответ
+        event_index.add_event({
+            "id": event_id,
+            "title": title,
+            "description": description,
+            "city": city,
+            "date_time": date_time,
+        })
+        return jsonify({"message": "Event created successfully", "id": event_id}), 201
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     finally:
@@ -245,6 +275,259 @@ def create_event():
             conn.close()
 
 
+IMPORT_BATCH_SIZE = 500
+IMPORT_READ_CHUNK = 64 * 1024
+
+
+def _iter_stream_lines(stream):
+    # Читаем поток крупными кусками: построчное чтение request.stream идёт по байту
+    tail = b""
+    while True:
+        chunk = stream.read(IMPORT_READ_CHUNK)
+        if not chunk:
+            break
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line + b"\n"
+    if tail:
+        yield tail
+
+
+def _decode_csv_lines(lines, bad_lines):
+    # Декодируем по строкам, чтобы ошибка кодировки портила только свою запись.
+    # utf-8-sig убирает BOM, который добавляет Excel
+    for line_number, line in enumerate(lines, start=1):
+        encoding = "utf-8-sig" if line_number == 1 else "utf-8"
+        try:
+            yield line.decode(encoding)
+        except UnicodeDecodeError:
+            bad_lines.add(line_number)
+            yield line.decode(encoding, errors="replace")
+
+
+IMPORT_REQUIRED_COLUMNS = ("title", "date_time", "city", "location")
+
+
+def _read_csv_rows(reader, header, bad_lines):
+    last_line = reader.line_num
+    while True:
+        try:
+            record = next(reader)
+        except StopIteration:
+            break
+        except csv.Error as e:
+            yield last_line + 1, f"Invalid CSV: {e}"
+            last_line = reader.line_num
+            continue
+        start_line, last_line = last_line + 1, reader.line_num
+        if not record:
+            continue
+        if any(line in bad_lines for line in range(start_line, last_line + 1)):
+            yield start_line, "Invalid UTF-8 encoding"
+            continue
+        row = dict(zip(header, record))
+        # В CSV категории передаются через ";" — "1;4;7"
+        categories = row.get("categories") or ""
+        row["categories"] = [c.strip() for c in categories.split(";") if c.strip()]
+        yield start_line, row
+
+
+def _read_ndjson_rows(lines):
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, "Row must be a JSON object"
+            continue
+        yield line_number, row
+
+
+def _read_import_rows(content_type):
+    """Построчно читает тело запроса, не загружая его целиком в память.
+
+    Возвращает (строки, None) или (None, ошибка), если заголовок CSV не прочитан
+    или в нём нет обязательных колонок. Строки — пары (номер строки, dict) или
+    (номер строки, текст ошибки). Номер строки — физическая строка файла, с которой
+    начинается запись, считая с 1 (в CSV заголовок — строка 1, пустые строки
+    тоже считаются).
+    """
+    lines = _iter_stream_lines(request.stream)
+    if content_type != "text/csv":
+        return _read_ndjson_rows(lines), None
+
+    bad_lines = set()
+    reader = csv.reader(_decode_csv_lines(lines, bad_lines))
+    try:
+        header = [name.strip() for name in next(reader)]
+    except StopIteration:
+        return None, "CSV header is missing"
+    except csv.Error as e:
+        return None, f"Invalid CSV header: {e}"
+    if bad_lines:
+        return None, "Invalid UTF-8 encoding in CSV header"
+    missing = [column for column in IMPORT_REQUIRED_COLUMNS if column not in header]
+    if missing:
+        return None, f"CSV header is missing columns: {', '.join(missing)}"
+    return _read_csv_rows(reader, header, bad_lines), None
+
+
+def _validate_import_row(row, user_id):
+    if _has_non_string_fields(row):
+        return None, "Title, description, date, city, and location must be strings"
+
+    title = row.get("title")
+    city = row.get("city")
+    location = row.get("location")
+    categories = row.get("categories") or []
+
+    if not title or not row.get("date_time") or not city or not location:
+        return None, "Title, date, city, and location are required"
+    if not isinstance(categories, list) or not all(
+        isinstance(c, (int, str)) and not isinstance(c, bool) for c in categories
+    ):
+        return None, "Categories must be a list of category IDs"
+    # Повтор (event_id, category_id) уронил бы всю пачку
+    categories = list(dict.fromkeys(str(c) for c in categories))
+
+    date_time = parse_date_time(row["date_time"])
+    if date_time is None:
+        return None, INVALID_DATE_TIME_ERROR
+
+    event = (str(uuid.uuid4()), title, row.get("description"), date_time, city, location, user_id)
+    return (event, categories), None
+
+
+def _insert_import_rows(cursor, rows):
+    # executemany склеивает INSERT ... VALUES в многострочные запросы
+    cursor.executemany(
+        """
+        INSERT INTO events (id, title, description, date_time, city, location, created_by)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """,
+        [event for _, (event, _) in rows],
+    )
+    event_categories = [
+        (event[0], category_id) for _, (event, categories) in rows for category_id in categories
+    ]
+    if event_categories:
+        cursor.executemany(
+            "INSERT INTO event_categories (event_id, category_id) VALUES (%s, %s)",
+            event_categories,
+        )
+
+
+def _flush_import_batch(conn, batch, errors):
+    """Вставляет пачку в одной транзакции, возвращает вставленные (событие, категории).
+
+    Если пачка не прошла, повторяет вставку построчно, чтобы найти плохие строки.
+    """
+    try:
+        with conn.cursor() as cursor:
+            _insert_import_rows(cursor, batch)
+        conn.commit()
+        return [values for _, values in batch]
+    except Exception:
+        conn.rollback()
+
+    inserted = []
+    for line_number, values in batch:
+        try:
+            with conn.cursor() as cursor:
+                _insert_import_rows(cursor, [(line_number, values)])
+            conn.commit()
+            inserted.append(values)
+        except Exception as e:
+            conn.rollback()
+            errors.append({"line": line_number, "error": str(e)})
+    return inserted
+
+
+def _index_imported_events(events):
+    # Индексируем из уже проверенных значений, без повторного чтения из БД
+    for (event_id, title, description, date_time, city, _, _), categories in events:
+        event_index.add_event({
+            "id": event_id,
+            "title": title,
+            "description": description,
+            "city": city,
+            "date_time": date_time,
+            "categories": categories,
+        })
+
+
+@app.route("/events/import", methods=["POST"])
+@jwt_required()
+def import_events():
+    """Импорт событий из NDJSON или CSV.
+
+    В ответе errors — список {"line": N, "error": ...}, где N — номер строки
+    файла, с которой начинается запись (с 1, заголовок CSV — строка 1).
+    elapsed и rows_per_second — время импорта и скорость по всем строкам.
+    """
+    content_type = request.mimetype
+    if content_type not in ("text/csv", "application/x-ndjson", "application/jsonl"):
+        return jsonify({"error": "Use text/csv or application/x-ndjson body"}), 415
+
+    user_id = get_jwt_identity()
+    imported = 0
+    errors = []
+    started = time.perf_counter()
+
+    rows, error = _read_import_rows(content_type)
+    if error:
+        return jsonify({"error": error}), 400
+
+    conn = None
+    try:
+        conn = get_db_connection()
+        batch = []
+        for line_number, row in rows:
+            if isinstance(row, str):
+                errors.append({"line": line_number, "error": row})
+                continue
+            values, error = _validate_import_row(row, user_id)
+            if error:
+                errors.append({"line": line_number, "error": error})
+                continue
+            batch.append((line_number, values))
+
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                events = _flush_import_batch(conn, batch, errors)
+                _index_imported_events(events)
+                imported += len(events)
+                batch = []
+
+        if batch:
+            events = _flush_import_batch(conn, batch, errors)
+            _index_imported_events(events)
+            imported += len(events)
+
+        elapsed = time.perf_counter() - started
+        total = imported + len(errors)
+
+        errors.sort(key=lambda error: error["line"])
+        return jsonify({
+            "imported": imported,
+            "failed": len(errors),
+            "errors": errors,
+            "elapsed": round(elapsed, 3),
+            "rows_per_second": round(total / elapsed) if elapsed else None,
+        }), 200
+    except Exception as e:
+        # Уже закоммиченные пачки остаются в БД, поэтому возвращаем и накопленные ошибки
+        errors.sort(key=lambda error: error["line"])
+        return jsonify({"error": str(e), "imported": imported, "failed": len(errors), "errors": errors}), 500
+    finally:
+        if conn:
+            conn.close()
+
+
 @app.route("/events", methods=["GET"])
 @jwt_required() 
 def get_events():
@@ -300,6 +583,67 @@ def get_events():
         if conn:
             conn.close()
 
+SEARCH_DEFAULT_LIMIT = 50
+SEARCH_MAX_LIMIT = 200
+
+
+@app.route("/events/search", methods=["GET"])
+@jwt_required()
+def search_events():
+    query = request.args.get("q", "").strip()
+    city = request.args.get("city", None)
+    categories = request.args.getlist("categories")
+    show_finished = request.args.get("show_finished", "false").lower() == "true"
+    try:
+        limit = min(int(request.args.get("limit", SEARCH_DEFAULT_LIMIT)), SEARCH_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    if not query:
+        return jsonify({"error": "Query parameter 'q' is required"}), 400
+    if limit <= 0:
+        return jsonify({"error": "limit must be positive"}), 400
+
+    if not event_index.ready:
+        # Перезапускает загрузку, если предыдущая попытка упала
+        event_index.start_build(get_db_connection)
+        return jsonify({"error": "Search index is loading, try again later"}), 503
+
+    conn = None
+    try:
+        # Город, дата и категории фильтруются прямо в индексе, результаты уже отсортированы
+        # по релевантности. Город сравнивается без учёта регистра и диакритики, как при collation *_ai_ci
+        ranked = event_index.search(
+            query,
+            city=city,
+            date_from=None if show_finished else datetime.utcnow(),
+            categories=categories,
+            limit=limit,
+        )
+        event_ids = [event_id for event_id, _ in ranked]
+        if not event_ids:
+            return jsonify([]), 200
+
+        conn = get_db_connection()
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT e.id, e.title, e.description, e.date_time, e.city, e.location
+                FROM events e
+                WHERE e.id IN %s
+                """,
+                (tuple(event_ids),)
+            )
+            rows = {row["id"]: row for row in cursor.fetchall()}
+
+        events = [rows[event_id] for event_id in event_ids if event_id in rows]
+        return jsonify(events), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    finally:
+        if conn:
+            conn.close()
+
 @app.route("/events/<event_id>", methods=["GET"])
 @jwt_required(optional=True)
 def get_event(event_id):
@@ -659,4 +1003,6 @@ def leave_chat(data):
     emit("chat_left", {"message": f"User left chat for event {event_id}"}, room=event_id)
 
 if __name__ == "__main__":
+    # Индекс поиска загружается в фоне, пока он не готов /events/search отвечает 503
+    event_index.start_build(get_db_connection)
     app.run(host="0.0.0.0", port=5000)
@@ -0,0 +1,265 @@
+"""Бенчмарк POST /events/import для NDJSON и CSV.
+
+Запрос проходит через настоящее приложение (Flask test client, JWT, чтение
+request.stream кусками, проверка строк, пачки по IMPORT_BATCH_SIZE). Индекс
+поиска помечен загруженным, так что индексация тоже входит в замер.
+
+По умолчанию БД — заглушка: экранирование значений и склейка executemany
+в многострочные INSERT выполняются кодом PyMySQL, но готовые запросы не
+отправляются на сервер, а только считаются. Такой rows/s — стоимость
+разбора и проверки на стороне приложения, без INSERT и COMMIT.
+
+С BENCH_MYSQL=1 импорт идёт в MySQL из config.py. На одном соединении
+создаются временные таблицы events и event_categories (CREATE TEMPORARY
+TABLE ... LIKE), которые в этой сессии закрывают настоящие; приложение
+получает это же соединение. Так измеряются многострочные INSERT и COMMIT
+по пачкам, а в настоящие таблицы ничего не попадает. У временных таблиц
+нет внешних ключей.
+
+Заглушка, как PRIMARY KEY, отклоняет повтор (event_id, category_id).
+Строка с категорией BAD_CATEGORY отклоняется при вставке — заглушкой,
+а в MySQL строгим sql_mode (значение не влезает ни в INT, ни в VARCHAR
+колонки category_id), — поэтому её пачка проходит через построчный повтор.
+В каждом файле есть и строки, которые отсекает проверка; скрипт сверяет
+номера строк в отчёте об ошибках с ожидаемыми и проверяет ответы 400
+на плохой заголовок CSV.
+
+Не измеряется: сеть между клиентом и приложением.
+
+Запуск: python bench_import.py [количество_строк]
+"""
+import csv
+import io
+import json
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pymysql
+from flask_jwt_extended import create_access_token
+
+import app as app_module
+from search import event_index
+
+CITIES = ["Praha", "Brno", "Ostrava", "Plzeň", "Olomouc"]
+WORDS = ["koncert", "festival", "výstava", "přednáška", "trh", "jazz", "divadlo", "běh", "tanec", "kino"]
+BAD_CATEGORY = "bad-category-" + "x" * 300
+CATEGORY_PAIR_RE = re.compile(rb"\('([^']*)',\s*'?([^',)]*)'?\)")
+
+
+class StubCursor(pymysql.cursors.DictCursor):
+    def execute(self, query, args=None):
+        sql = self.mogrify(query, args)
+        if isinstance(sql, str):
+            sql = sql.encode()
+        if BAD_CATEGORY.encode() in sql:
+            raise pymysql.err.DataError(1406, "Data too long for column 'category_id'")
+        if sql.lstrip().startswith(b"INSERT INTO event_categories"):
+            pairs = CATEGORY_PAIR_RE.findall(sql)
+            # Как PRIMARY KEY (event_id, category_id)
+            if len(pairs) != len(set(pairs)):
+                raise pymysql.err.IntegrityError(1062, "Duplicate entry for key 'PRIMARY'")
+        rows = sql.count(b"),(") + 1
+        StubDatabase.statements += 1
+        StubDatabase.max_rows = max(StubDatabase.max_rows, rows)
+        if sql.lstrip().startswith(b"INSERT INTO events"):
+            self.connection.pending_events += rows
+        self.rowcount = rows
+        return rows
+
+
+class StubConnection(pymysql.connections.Connection):
+    def __init__(self):
+        super().__init__(defer_connect=True, charset="utf8mb4")
+        # Без соединения экранированию нужен статус сервера; 0 — режим MySQL по умолчанию
+        self.server_status = 0
+        self.pending_events = 0
+
+    def cursor(self, cursor=None):
+        return StubCursor(self)
+
+    def commit(self):
+        StubDatabase.committed += self.pending_events
+        self.pending_events = 0
+
+    def rollback(self):
+        self.pending_events = 0
+
+    def close(self):
+        pass
+
+
+class StubDatabase:
+    name = "stub"
+    statements = 0
+    max_rows = 0
+    committed = 0
+
+    def connect(self):
+        return StubConnection()
+
+    def reset(self):
+        StubDatabase.statements = StubDatabase.max_rows = StubDatabase.committed = 0
+
+    def committed_events(self):
+        return StubDatabase.committed
+
+    def check_batching(self):
+        # executemany склеил пачку в многострочный INSERT
+        assert StubDatabase.max_rows >= app_module.IMPORT_BATCH_SIZE, StubDatabase.max_rows
+        return f"statements: {StubDatabase.statements} (max {StubDatabase.max_rows} rows)"
+
+
+class SharedConnection:
+    """Одно соединение на все запросы: временные таблицы живут только в своей сессии."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        pass
+
+
+class MysqlDatabase:
+    name = "MySQL"
+    tables = ("events", "event_categories")
+
+    def __init__(self):
+        from db import get_db_connection
+
+        self.conn = get_db_connection()
+
+    def connect(self):
+        return SharedConnection(self.conn)
+
+    def reset(self):
+        with self.conn.cursor() as cursor:
+            for table in self.tables:
+                cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {table}")
+                cursor.execute(f"CREATE TEMPORARY TABLE {table} LIKE {table}")
+                cursor.execute(f"SHOW CREATE TABLE {table}")
+                # Без временной таблицы импорт пошёл бы в настоящую
+                assert "CREATE TEMPORARY TABLE" in cursor.fetchone()["Create Table"], table
+        self.conn.commit()
+
+    def committed_events(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) AS count FROM events")
+            return cursor.fetchone()["count"]
+
+    def check_batching(self):
+        return "server: MySQL"
+
+
+def generate_rows(count, seed=7):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    for _ in range(count):
+        yield {
+            "title": " ".join(rng.choices(WORDS, k=3)),
+            "description": " ".join(rng.choices(WORDS, k=25)),
+            "date_time": (now + timedelta(days=rng.randint(1, 365))).strftime("%Y-%m-%d %H:%M:%S"),
+            "city": rng.choice(CITIES),
+            "location": f"{rng.uniform(48, 51):.5f},{rng.uniform(12, 18):.5f}",
+            "categories": [str(c) for c in rng.sample(range(1, 20), 2)],
+        }
+
+
+def build_ndjson(rows):
+    """Возвращает тело и ожидаемые номера строк с ошибками."""
+    lines = [json.dumps(row, ensure_ascii=False).encode() for row in rows]
+    lines[10] = b'{"title": "broken'
+    lines[20] = json.dumps(dict(rows[20], title=None)).encode()
+    lines[30] = json.dumps(dict(rows[30], categories=[[1, 2]])).encode()
+    lines[35] = json.dumps(dict(rows[35], title=["x"])).encode()
+    # Повтор категории не ошибка: дубликаты убираются при проверке
+    lines[37] = json.dumps(dict(rows[37], categories=["1", "1", 1])).encode()
+    lines[600] = json.dumps(dict(rows[600], categories=[BAD_CATEGORY])).encode()
+    # Пустая строка тоже считается, поэтому строка 601 становится 602
+    lines.insert(40, b"")
+    return b"\n".join(lines) + b"\n", [11, 21, 31, 36, 602]
+
+
+def build_csv(rows):
+    rows = [dict(row) for row in rows]
+    # Многострочное поле в кавычках: все следующие записи начинаются на строку позже
+    rows[49]["description"] = "two\nlines"
+    rows[600]["categories"] = [BAD_CATEGORY]
+
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["title", "description", "date_time", "city", "location", "categories"])
+    for row in rows:
+        writer.writerow([row["title"], row["description"], row["date_time"], row["city"], row["location"],
+                         ";".join(row["categories"])])
+    # Строка 1 — заголовок, строка N файла — lines[N - 1]
+    lines = out.getvalue().encode().split(b"\r\n")
+    lines[11] += b"\xff"  # битый UTF-8
+    lines[21] = lines[21].split(b",", 1)[1]  # без title, поля сдвинуты
+    # Excel сохраняет CSV с BOM
+    return b"\xef\xbb\xbf" + b"\r\n".join(lines), [12, 22, 603]
+
+
+def post(client, headers, content_type, body):
+    return client.post("/events/import", input_stream=io.BytesIO(body), content_type=content_type, headers=headers)
+
+
+def run(client, headers, database, name, content_type, body, row_count, expected_error_lines):
+    database.reset()
+    start = time.perf_counter()
+    response = post(client, headers, content_type, body)
+    elapsed = time.perf_counter() - start
+    result = response.get_json()
+
+    assert response.status_code == 200, result
+    error_lines = [error["line"] for error in result["errors"]]
+    assert error_lines == expected_error_lines, result["errors"]
+    assert result["imported"] == row_count - len(expected_error_lines) == database.committed_events(), result
+    print(
+        f"{name:<7} rows: {row_count}, imported: {result['imported']}, failed: {result['failed']}, "
+        f"{database.check_batching()}, {elapsed:.2f}s, {row_count / elapsed:,.0f} rows/s "
+        f"(server reports {result['rows_per_second']:,} rows/s)"
+    )
+    for error in result["errors"]:
+        print(f"        line {error['line']}: {error['error'][:100]}")
+
+
+def check_csv_headers(client, headers):
+    cases = [
+        (b"", "CSV header is missing"),
+        (b"title,description,city\r\nx,y,Brno\r\n", "CSV header is missing columns: date_time, location"),
+        (b"ti\xfftle,date_time,city,location\r\n", "Invalid UTF-8 encoding in CSV header"),
+    ]
+    for body, error in cases:
+        response = post(client, headers, "text/csv", body)
+        assert response.status_code == 400 and response.get_json()["error"] == error, response.get_json()
+    print(f"CSV header: {len(cases)} malformed headers rejected with 400")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rows = list(generate_rows(count))
+
+    database = MysqlDatabase() if os.getenv("BENCH_MYSQL") == "1" else StubDatabase()
+    app_module.get_db_connection = database.connect
+    event_index.load([])
+    client = app_module.app.test_client()
+    with app_module.app.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity='bench-user')}"}
+
+    print(f"database: {database.name}")
+    body, expected = build_ndjson(rows)
+    run(client, headers, database, "NDJSON", "application/x-ndjson", body, count, expected)
+    body, expected = build_csv(rows)
+    run(client, headers, database, "CSV", "text/csv", body, count, expected)
+    check_csv_headers(client, headers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Бенчмарк поиска событий: инвертированный индекс против LIKE '%q%'.
+
+Обе стороны считают одно и то же множество результатов с теми же фильтрами,
+что и GET /events/search: все слова запроса, date_time >= сейчас (как без
+show_finished) и, в следующих сериях, фильтр по городу, по популярной категории
+(есть у половины событий) и по редкой. Базовый вариант фильтрует категории
+так же, как GET /events, — JOIN с event_categories и category_id IN (...).
+Для индекса отдельно показано время пути эндпоинта — limit=50 лучших по
+релевантности.
+
+Базовый вариант по умолчанию — SQLite в памяти. Свёртка диакритики и регистра
+в нём эмулируется заранее свёрнутыми колонками, как это делает collation
+utf8mb4_0900_ai_ci в MySQL. С BENCH_MYSQL=1 тот же LIKE выполняется в MySQL
+из config.py во временной таблице (CREATE TEMPORARY TABLE, данные не остаются).
+
+Не измеряется: сетевые задержки, запрос строк событий по найденным id
+и первичная загрузка индекса из БД — для неё показано только время
+построения из памяти.
+
+Запуск: python bench_search.py [количество_событий]
+"""
+import itertools
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+
+from search import EventSearchIndex, fold
+
+WORDS = [
+    "koncert", "concert", "festival", "divadlo", "theatre", "výstava", "exhibition",
+    "běh", "running", "fotbal", "football", "hudba", "music", "jazz", "rock",
+    "přednáška", "lecture", "workshop", "trh", "market", "pivo", "beer", "víno", "wine",
+    "park", "náměstí", "square", "letní", "summer", "zimní", "winter", "noční", "night",
+    "rodina", "family", "děti", "kids", "jídlo", "food", "tanec", "dance", "kino", "cinema",
+]
+# Остальной словарь: синтетические слова с распределением Ципфа, как в реальном тексте.
+# Одинаковая длина слов исключает совпадения подстрок, поэтому LIKE и индекс находят одно и то же
+FILLER_WORDS = [f"slovo{i:05d}" for i in range(20_000)]
+FILLER_CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(FILLER_WORDS))))
+CITIES = ["Praha", "Brno", "Ostrava", "Plzeň", "Olomouc", "Liberec", "České Budějovice"]
+POPULAR_CATEGORY = 1
+RARE_CATEGORY = 7
+QUERIES = ["koncert", "jazz night", "letni festival", "vystava", "pivo trh", "kids dance", "slovo01500"]
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+REPEAT = 5
+
+
+def generate_categories(rng):
+    categories = set(rng.sample(range(2, 21), k=rng.randint(1, 2)))
+    if rng.random() < 0.5:
+        categories.add(POPULAR_CATEGORY)
+    return sorted(categories)
+
+
+def generate_events(count, seed=42):
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    for i in range(count):
+        yield {
+            "id": f"event-{i}",
+            "title": " ".join(rng.choices(WORDS, k=2) + rng.choices(FILLER_WORDS, cum_weights=FILLER_CUM_WEIGHTS, k=3)),
+            "description": " ".join(
+                rng.choices(WORDS, k=3) + rng.choices(FILLER_WORDS, cum_weights=FILLER_CUM_WEIGHTS, k=30)
+            ),
+            "city": rng.choice(CITIES),
+            "date_time": now + timedelta(days=rng.randint(-365, 365)),
+            "categories": generate_categories(rng),
+        }
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = fn()
+    return (time.perf_counter() - start) / REPEAT, result
+
+
+class SqliteBaseline:
+    name = "SQLite"
+
+    def __init__(self, events):
+        self.db = sqlite3.connect(":memory:")
+        self.db.execute(
+            "CREATE TABLE events (id TEXT PRIMARY KEY, title TEXT, description TEXT, city TEXT, date_time TEXT)"
+        )
+        self.db.executemany(
+            "INSERT INTO events VALUES (?, ?, ?, ?, ?)",
+            (
+                (e["id"], fold(e["title"]), fold(e["description"]), fold(e["city"]), e["date_time"].strftime(DATE_FORMAT))
+                for e in events
+            ),
+        )
+        self.db.execute("CREATE TABLE event_categories (event_id TEXT, category_id INTEGER, PRIMARY KEY (event_id, category_id))")
+        self.db.executemany(
+            "INSERT INTO event_categories VALUES (?, ?)",
+            ((e["id"], category_id) for e in events for category_id in e["categories"]),
+        )
+
+    def search(self, query, city, date_from, categories):
+        terms = query.split()
+        conditions = ["(e.title LIKE ? OR e.description LIKE ?)" for _ in terms] + ["e.date_time >= ?"]
+        params = [f"%{fold(t)}%" for t in terms for _ in range(2)] + [date_from.strftime(DATE_FORMAT)]
+        sql = "SELECT DISTINCT e.id FROM events e"
+        if categories:
+            sql += " JOIN event_categories ec ON e.id = ec.event_id"
+            conditions.append(f"ec.category_id IN ({', '.join('?' for _ in categories)})")
+            params.extend(categories)
+        if city:
+            conditions.append("e.city = ?")
+            params.append(fold(city))
+        sql += " WHERE " + " AND ".join(conditions)
+        return self.db.execute(sql, params).fetchall()
+
+
+class MysqlBaseline:
+    name = "MySQL"
+
+    def __init__(self, events):
+        from db import get_db_connection
+
+        self.conn = get_db_connection()
+        with self.conn.cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE TEMPORARY TABLE bench_events (
+                    id VARCHAR(36) PRIMARY KEY, title VARCHAR(255), description TEXT,
+                    city VARCHAR(100), date_time DATETIME
+                ) DEFAULT CHARSET utf8mb4 COLLATE utf8mb4_0900_ai_ci
+                """
+            )
+            rows = [(e["id"], e["title"], e["description"], e["city"], e["date_time"]) for e in events]
+            for start in range(0, len(rows), 5000):
+                cursor.executemany(
+                    "INSERT INTO bench_events VALUES (%s, %s, %s, %s, %s)", rows[start:start + 5000]
+                )
+            cursor.execute(
+                """
+                CREATE TEMPORARY TABLE bench_event_categories (
+                    event_id VARCHAR(36), category_id INT, PRIMARY KEY (event_id, category_id)
+                )
+                """
+            )
+            rows = [(e["id"], category_id) for e in events for category_id in e["categories"]]
+            for start in range(0, len(rows), 5000):
+                cursor.executemany(
+                    "INSERT INTO bench_event_categories VALUES (%s, %s)", rows[start:start + 5000]
+                )
+        self.conn.commit()
+
+    def search(self, query, city, date_from, categories):
+        terms = query.split()
+        conditions = ["(e.title LIKE %s OR e.description LIKE %s)" for _ in terms] + ["e.date_time >= %s"]
+        params = [f"%{t}%" for t in terms for _ in range(2)] + [date_from]
+        sql = "SELECT DISTINCT e.id FROM bench_events e"
+        if categories:
+            sql += " JOIN bench_event_categories ec ON e.id = ec.event_id"
+            conditions.append("ec.category_id IN %s")
+            params.append(tuple(categories))
+        if city:
+            conditions.append("e.city = %s")
+            params.append(city)
+        with self.conn.cursor() as cursor:
+            cursor.execute(sql + " WHERE " + " AND ".join(conditions), params)
+            return cursor.fetchall()
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    events = list(generate_events(count))
+
+    start = time.perf_counter()
+    index = EventSearchIndex()
+    index.load(events)
+    build_time = time.perf_counter() - start
+
+    baseline = (MysqlBaseline if os.getenv("BENCH_MYSQL") == "1" else SqliteBaseline)(events)
+    date_from = datetime.utcnow()
+
+    print(f"events: {count}, index build: {build_time:.2f}s, baseline: {baseline.name} LIKE")
+    series = [(None, None), ("Praha", None), (None, [POPULAR_CATEGORY]), (None, [RARE_CATEGORY])]
+    for city, categories in series:
+        print(f"\ncity: {city or '-'}, categories: {categories or '-'}, date_time >= now")
+        print(f"{'query':<16} {'index all ms':>13} {'LIKE all ms':>12} {'hits':>7} {'index top-50 ms':>16}")
+        for query in QUERIES:
+            index_time, hits = timed(
+                lambda: index.search(query, city=city, date_from=date_from, categories=categories)
+            )
+            like_time, rows = timed(lambda: baseline.search(query, city, date_from, categories))
+            top_time, _ = timed(
+                lambda: index.search(query, city=city, date_from=date_from, categories=categories, limit=50)
+            )
+            hit_count = str(len(hits)) if len(hits) == len(rows) else f"{len(hits)}!={len(rows)}"
+            print(
+                f"{query:<16} {index_time * 1000:>13.2f} {like_time * 1000:>12.2f} {hit_count:>7} {top_time * 1000:>16.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import heapq
+import logging
+import math
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Совпадение в заголовке весит больше, чем в описании
+TITLE_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+
+# Параметры BM25
+K1 = 1.2
+B = 0.75
+
+LOAD_BATCH_SIZE = 5000
+
+
+def fold(text):
+    """Приводит текст к нижнему регистру и убирает диакритику ("Děčín" -> "decin")."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.casefold()
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(fold(text))
+
+
+def parse_date_time(value):
+    """Приводит date_time к naive UTC datetime, как его сравнивает GET /events.
+
+    Принимает datetime или строку ISO 8601 ("2025-06-01 18:00:00", "2025-06-01T18:00:00Z").
+    Возвращает None, если значение не распознано.
+    """
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.strip())
+        except ValueError:
+            return None
+    else:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+class EventSearchIndex:
+    """Инвертированный индекс по title/description событий.
+
+    Загружается из таблиц events и event_categories в фоновом потоке
+    (start_build()), после чего поддерживается инкрементально через add_event().
+    Пока загрузка не закончилась, ready == False и поиск выполнять нельзя.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._building = False
+        self._built = False
+        self._postings = defaultdict(dict)  # term -> {event_id: weighted tf}
+        self._docs = {}  # event_id -> (terms, length, folded city, date_time)
+        self._categories = defaultdict(set)  # event_id -> {category_id как str}
+        self._total_length = 0
+
+    @property
+    def ready(self):
+        return self._built
+
+    def _add(self, event_id, title, description, city, date_time, categories=None):
+        # Всё, что может упасть, считаем до изменения индекса
+        freqs = defaultdict(int)
+        for term in tokenize(title):
+            freqs[term] += TITLE_WEIGHT
+        for term in tokenize(description):
+            freqs[term] += DESCRIPTION_WEIGHT
+        length = sum(freqs.values())
+        doc = (tuple(freqs), length, fold(city), parse_date_time(date_time))
+        category_ids = {str(category_id) for category_id in categories} if categories is not None else None
+
+        if event_id in self._docs:
+            self._remove(event_id)
+        for term, tf in freqs.items():
+            self._postings[term][event_id] = tf
+        self._docs[event_id] = doc
+        self._total_length += length
+        if category_ids is not None:
+            self._categories[event_id] = category_ids
+
+    def _remove(self, event_id):
+        terms, length, _, _ = self._docs.pop(event_id)
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(event_id, None)
+            if not postings:
+                del self._postings[term]
+        self._total_length -= length
+
+    def _add_rows(self, rows):
+        with self._lock:
+            for row in rows:
+                self._add(
+                    row["id"], row["title"], row["description"], row["city"], row["date_time"],
+                    row.get("categories"),
+                )
+
+    def _add_category_rows(self, rows):
+        with self._lock:
+            for row in rows:
+                self._categories[row["event_id"]].add(str(row["category_id"]))
+
+    def load(self, rows):
+        self._add_rows(rows)
+        self._built = True
+
+    def start_build(self, get_connection):
+        """Запускает загрузку индекса из БД в фоновом потоке, если она ещё не идёт."""
+        with self._lock:
+            if self._built or self._building:
+                return
+            self._building = True
+        threading.Thread(target=self._build, args=(get_connection,), daemon=True).start()
+
+    def _build(self, get_connection):
+        conn = None
+        try:
+            conn = get_connection()
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT id, title, description, city, date_time FROM events")
+                while True:
+                    rows = cursor.fetchmany(LOAD_BATCH_SIZE)
+                    if not rows:
+                        break
+                    # Блокировка берётся на пачку, чтобы create_event не ждал всю загрузку
+                    self._add_rows(rows)
+                cursor.execute("SELECT event_id, category_id FROM event_categories")
+                while True:
+                    rows = cursor.fetchmany(LOAD_BATCH_SIZE)
+                    if not rows:
+                        break
+                    self._add_category_rows(rows)
+            self._built = True
+        except Exception:
+            logger.exception("Search index build failed")
+        finally:
+            self._building = False
+            if conn:
+                conn.close()
+
+    def add_event(self, event):
+        """Индексирует только что созданное событие.
+
+        Во время загрузки событие тоже индексируется: его может не быть
+        в снимке, который читает загрузка. Ошибка индексации только
+        логируется — событие уже сохранено в БД.
+        """
+        with self._lock:
+            if not (self._built or self._building):
+                # Индекс ещё не загружается — событие подхватится из БД
+                return
+            try:
+                self._add(
+                    event["id"], event["title"], event["description"], event["city"], event["date_time"],
+                    event.get("categories"),
+                )
+            except Exception:
+                logger.exception("Failed to index event %s", event.get("id"))
+
+    def search(self, query, city=None, date_from=None, categories=None, limit=None):
+        """Возвращает список (event_id, score), отсортированный по релевантности.
+
+        Событие должно содержать все слова запроса. Город сравнивается без учёта
+        регистра и диакритики — так же, как `e.city = %s` при стандартной
+        collation utf8mb4 (*_ai_ci); при другой collation результаты GET /events
+        могут отличаться. categories оставляет события хотя бы одной из
+        категорий; категории, изменённые в БД в обход приложения, индекс не видит.
+        Если задан limit, возвращаются только limit лучших результатов.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        folded_city = fold(city) if city else None
+        category_ids = {str(category_id) for category_id in categories} if categories else None
+
+        with self._lock:
+            postings = [self._postings.get(term) for term in terms]
+            if not all(postings):
+                return []
+            # Начинаем пересечение с самого редкого слова
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for other in postings[1:]:
+                candidates.intersection_update(other)
+                if not candidates:
+                    return []
+
+            doc_count = len(self._docs)
+            avg_length = self._total_length / doc_count if doc_count else 0
+            idfs = [math.log(1 + (doc_count - len(p) + 0.5) / (len(p) + 0.5)) for p in postings]
+
+            results = []
+            for event_id in candidates:
+                _, length, doc_city, date_time = self._docs[event_id]
+                if folded_city and doc_city != folded_city:
+                    continue
+                if date_from and (date_time is None or date_time < date_from):
+                    continue
+                if category_ids and category_ids.isdisjoint(self._categories.get(event_id, ())):
+                    continue
+                norm = K1 * (1 - B + B * length / avg_length) if avg_length else K1
+                score = 0.0
+                for p, idf in zip(postings, idfs):
+                    tf = p[event_id]
+                    score += idf * tf * (K1 + 1) / (tf + norm)
+                results.append((event_id, score))
+
+        if limit is not None:
+            return heapq.nlargest(limit, results, key=lambda item: item[1])
+        results.sort(key=lambda item: item[1], reverse=True)
+        return results
+
+
+event_index = EventSearchIndex()